@@ -7,7 +7,10 @@ import sqlite3
 import json
 from datetime import datetime, date
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
+
+import orjson
+
 from models import Trade, DailyStats, OrderStatus, Side, TradeLogEntry, Session, BotRecord
 
 DB_PATH = Path(os.environ.get("DB_PATH", Path(__file__).parent.parent / "bot_data.db"))
@@ -20,6 +23,18 @@ def get_connection() -> sqlite3.Connection:
     return conn
 
 
+def loads_log_data(raw):
+    """Decode a stored trade_log_data blob.
+
+    orjson handles the common case; blobs written by json.dumps may contain
+    NaN/Infinity, which only the stdlib parser accepts, so retry with it.
+    """
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        return json.loads(raw)
+
+
 def init_db():
     """Create tables if they don't exist."""
     conn = get_connection()
@@ -170,6 +185,28 @@ def get_sessions(limit: int = 20, offset: int = 0, bot_id: Optional[int] = None)
     return [_row_to_session(r) for r in rows]
 
 
+def get_latest_sessions(bot_ids: list[int]) -> dict[int, Session]:
+    """Get the most recent session for each bot in one query.
+
+    Returns {bot_id: Session}; bots without sessions are omitted.
+    """
+    if not bot_ids:
+        return {}
+    conn = get_connection()
+    placeholders = ",".join("?" * len(bot_ids))
+    rows = conn.execute(
+        f"""SELECT * FROM (
+                SELECT *, ROW_NUMBER() OVER (
+                    PARTITION BY bot_id ORDER BY start_time DESC
+                ) AS rn
+                FROM sessions WHERE bot_id IN ({placeholders})
+            ) WHERE rn = 1""",
+        bot_ids,
+    ).fetchall()
+    conn.close()
+    return {r["bot_id"]: _row_to_session(r) for r in rows}
+
+
 def get_session(session_id: int) -> Optional[Session]:
     conn = get_connection()
     row = conn.execute(
@@ -267,16 +304,6 @@ def get_trades(limit: int = 50, offset: int = 0, bot_id: Optional[int] = None) -
     return [_row_to_trade(r) for r in rows]
 
 
-def get_all_trades() -> list[Trade]:
-    """Get all trades from the database."""
-    conn = get_connection()
-    rows = conn.execute(
-        "SELECT * FROM trades ORDER BY timestamp ASC"
-    ).fetchall()
-    conn.close()
-    return [_row_to_trade(r) for r in rows]
-
-
 def get_trade_log_data(trade_id: int) -> Optional[str]:
     """Get trade log data for a specific trade."""
     conn = get_connection()
@@ -290,6 +317,40 @@ def get_trade_log_data(trade_id: int) -> Optional[str]:
     return None
 
 
+def iter_all_trades_with_log_data(chunk_size: int = 500) -> Iterator[tuple[Trade, Optional[str]]]:
+    """Yield every trade with its raw log data, oldest first.
+
+    Reads trades and log blobs in one query (fetched in chunks of
+    ``chunk_size``) instead of a get_trade_log_data call per trade. The
+    connection and its read transaction stay open until the generator is
+    exhausted or closed.
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.execute("SELECT * FROM trades ORDER BY timestamp ASC")
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            for row in rows:
+                yield _row_to_trade(row), row["trade_log_data"]
+    finally:
+        conn.close()
+
+
+def get_trade_log_counts() -> tuple[int, int]:
+    """Return (total_trades, trades_with_log_data) without loading any rows."""
+    conn = get_connection()
+    row = conn.execute(
+        """SELECT
+            COUNT(*) as total_trades,
+            COALESCE(SUM(CASE WHEN trade_log_data IS NOT NULL AND trade_log_data != '' THEN 1 ELSE 0 END), 0) as with_log
+        FROM trades"""
+    ).fetchone()
+    conn.close()
+    return row["total_trades"], row["with_log"]
+
+
 def get_trades_for_market(condition_id: str) -> list[Trade]:
     conn = get_connection()
     rows = conn.execute(
@@ -300,25 +361,32 @@ def get_trades_for_market(condition_id: str) -> list[Trade]:
     return [_row_to_trade(r) for r in rows]
 
 
-def get_trades_for_session(session_id: int) -> list[Trade]:
+def get_trades_for_session(session_id: int, limit: Optional[int] = None) -> list[Trade]:
     conn = get_connection()
-    rows = conn.execute(
-        "SELECT * FROM trades WHERE session_id = ? ORDER BY timestamp DESC",
-        (session_id,),
-    ).fetchall()
+    if limit is not None:
+        rows = conn.execute(
+            "SELECT * FROM trades WHERE session_id = ? ORDER BY timestamp DESC LIMIT ?",
+            (session_id, limit),
+        ).fetchall()
+    else:
+        rows = conn.execute(
+            "SELECT * FROM trades WHERE session_id = ? ORDER BY timestamp DESC",
+            (session_id,),
+        ).fetchall()
     conn.close()
     return [_row_to_trade(r) for r in rows]
 
 
-def get_trades_with_log_data(session_id: int) -> list[tuple[Trade, Optional[str]]]:
-    """Get all trades for a session with their log data in one query.
+def get_filled_trades_with_log_data(session_id: int) -> list[tuple[Trade, Optional[str]]]:
+    """Get a session's filled trades with their log data in one query.
 
     Returns list of (Trade, raw_json_string) tuples. Avoids N+1 queries
-    when building session exports.
+    when building session exports; unfilled trades (and their log blobs)
+    are filtered out in SQL.
     """
     conn = get_connection()
     rows = conn.execute(
-        "SELECT * FROM trades WHERE session_id = ? ORDER BY timestamp ASC",
+        "SELECT * FROM trades WHERE session_id = ? AND status = 'filled' ORDER BY timestamp ASC",
         (session_id,),
     ).fetchall()
     conn.close()
@@ -330,23 +398,6 @@ def get_trades_with_log_data(session_id: int) -> list[tuple[Trade, Optional[str]
     return results
 
 
-def get_today_trades(bot_id: Optional[int] = None) -> list[Trade]:
-    today = date.today().isoformat()
-    conn = get_connection()
-    if bot_id is not None:
-        rows = conn.execute(
-            "SELECT * FROM trades WHERE timestamp >= ? AND bot_id = ? ORDER BY timestamp",
-            (today, bot_id),
-        ).fetchall()
-    else:
-        rows = conn.execute(
-            "SELECT * FROM trades WHERE timestamp >= ? ORDER BY timestamp",
-            (today,),
-        ).fetchall()
-    conn.close()
-    return [_row_to_trade(r) for r in rows]
-
-
 def _row_to_trade(row: sqlite3.Row) -> Trade:
     return Trade(
         id=row["id"],
@@ -371,81 +422,89 @@ def _row_to_trade(row: sqlite3.Row) -> Trade:
 
 # --- Daily/Session Stats ---
 
-def get_session_stats(session_id: int) -> DailyStats:
-    """Calculate stats for a specific session."""
-    trades = get_trades_for_session(session_id)
-    
-    filled = [t for t in trades if t.status == OrderStatus.FILLED]
-    winners = [t for t in filled if (t.pnl or 0) > 0]
-    losers = [t for t in filled if (t.pnl or 0) < 0]
-    total_pnl = sum(t.pnl or 0 for t in filled)
-    fees = sum(t.fees for t in filled)
+def _aggregate_trade_stats(where: str, params: list) -> sqlite3.Row:
+    """Aggregate filled-trade stats in SQL instead of loading every row.
+
+    `row_count` counts all matching trades regardless of status, so callers
+    can tell "no trades" apart from "no filled trades".
+    """
+    conn = get_connection()
+    row = conn.execute(
+        f"""SELECT
+            COUNT(*) as row_count,
+            COALESCE(SUM(CASE WHEN status = 'filled' THEN 1 ELSE 0 END), 0) as total_trades,
+            COALESCE(SUM(CASE WHEN status = 'filled' AND pnl > 0 THEN 1 ELSE 0 END), 0) as winning_trades,
+            COALESCE(SUM(CASE WHEN status = 'filled' AND pnl < 0 THEN 1 ELSE 0 END), 0) as losing_trades,
+            COALESCE(SUM(CASE WHEN status = 'filled' THEN pnl END), 0) as total_pnl,
+            COALESCE(SUM(CASE WHEN status = 'filled' THEN fees END), 0) as fees_paid,
+            COALESCE(MAX(CASE WHEN status = 'filled' THEN COALESCE(pnl, 0) END), 0) as largest_win,
+            COALESCE(MIN(CASE WHEN status = 'filled' THEN COALESCE(pnl, 0) END), 0) as largest_loss
+        FROM trades WHERE {where}""",
+        params,
+    ).fetchone()
+    conn.close()
+    return row
+
 
+def _row_to_stats(label: str, row: sqlite3.Row) -> DailyStats:
+    total_trades = row["total_trades"]
     return DailyStats(
-        date=f"Session {session_id}",
-        total_trades=len(filled),
-        winning_trades=len(winners),
-        losing_trades=len(losers),
-        total_pnl=total_pnl,
-        fees_paid=fees,
-        win_rate=len(winners) / len(filled) if filled else 0.0,
-        largest_win=max((t.pnl or 0 for t in filled), default=0.0),
-        largest_loss=min((t.pnl or 0 for t in filled), default=0.0),
+        date=label,
+        total_trades=total_trades,
+        winning_trades=row["winning_trades"],
+        losing_trades=row["losing_trades"],
+        total_pnl=row["total_pnl"],
+        fees_paid=row["fees_paid"],
+        win_rate=row["winning_trades"] / total_trades if total_trades else 0.0,
+        largest_win=row["largest_win"],
+        largest_loss=row["largest_loss"],
     )
 
 
+def get_session_stats(session_id: int) -> DailyStats:
+    """Calculate stats for a specific session."""
+    row = _aggregate_trade_stats("session_id = ?", [session_id])
+    return _row_to_stats(f"Session {session_id}", row)
+
+
 def get_daily_stats(target_date: Optional[str] = None, bot_id: Optional[int] = None) -> DailyStats:
     if target_date is None:
         target_date = date.today().isoformat()
 
-    trades = get_today_trades(bot_id) if target_date == date.today().isoformat() else []
-
-    if not trades:
+    if target_date == date.today().isoformat():
+        where, params = "timestamp >= ?", [target_date]
+        if bot_id is not None:
+            where += " AND bot_id = ?"
+            params.append(bot_id)
+        row = _aggregate_trade_stats(where, params)
+        if row["row_count"]:
+            return _row_to_stats(target_date, row)
+
+    # Note: daily_stats table doesn't currently support bot_id breakdown
+    # So we only fallback to table if bot_id is None
+    if bot_id is None:
         conn = get_connection()
-        # Note: daily_stats table doesn't currently support bot_id breakdown
-        # So we only fallback to table if bot_id is None
-        if bot_id is None:
-            row = conn.execute(
-                "SELECT * FROM daily_stats WHERE date = ?", (target_date,)
-            ).fetchone()
-            conn.close()
-            if row:
-                return DailyStats(
-                    date=row["date"],
-                    total_trades=row["total_trades"],
-                    winning_trades=row["winning_trades"],
-                    losing_trades=row["losing_trades"],
-                    total_pnl=row["total_pnl"],
-                    fees_paid=row["fees_paid"],
-                    largest_win=row["largest_win"],
-                    largest_loss=row["largest_loss"],
-                    win_rate=(
-                        row["winning_trades"] / row["total_trades"]
-                        if row["total_trades"] > 0
-                        else 0.0
-                    ),
-                )
-        else:
-            conn.close()
-        return DailyStats(date=target_date)
-
-    filled = [t for t in trades if t.status == OrderStatus.FILLED]
-    winners = [t for t in filled if (t.pnl or 0) > 0]
-    losers = [t for t in filled if (t.pnl or 0) < 0]
-    total_pnl = sum(t.pnl or 0 for t in filled)
-    fees = sum(t.fees for t in filled)
-
-    return DailyStats(
-        date=target_date,
-        total_trades=len(filled),
-        winning_trades=len(winners),
-        losing_trades=len(losers),
-        total_pnl=total_pnl,
-        fees_paid=fees,
-        win_rate=len(winners) / len(filled) if filled else 0.0,
-        largest_win=max((t.pnl or 0 for t in filled), default=0.0),
-        largest_loss=min((t.pnl or 0 for t in filled), default=0.0),
-    )
+        row = conn.execute(
+            "SELECT * FROM daily_stats WHERE date = ?", (target_date,)
+        ).fetchone()
+        conn.close()
+        if row:
+            return DailyStats(
+                date=row["date"],
+                total_trades=row["total_trades"],
+                winning_trades=row["winning_trades"],
+                losing_trades=row["losing_trades"],
+                total_pnl=row["total_pnl"],
+                fees_paid=row["fees_paid"],
+                largest_win=row["largest_win"],
+                largest_loss=row["largest_loss"],
+                win_rate=(
+                    row["winning_trades"] / row["total_trades"]
+                    if row["total_trades"] > 0
+                    else 0.0
+                ),
+            )
+    return DailyStats(date=target_date)
 
 
 # --- Bot State KV Store ---
@@ -22,7 +22,7 @@ from fastapi.staticfiles import StaticFiles
 
 from config import config_manager, API_HOST, API_PORT
 from models import (
-    BotState, ConfigUpdateRequest, CreateBotRequest, UpdateBotRequest,
+    BotState, ConfigUpdateRequest, CreateBotRequest, UpdateBotRequest, Side,
 )
 from trading.trade_logger import trade_logger
 from swarm import SwarmManager
@@ -173,6 +173,16 @@ async def export_swarm_latest_sessions():
     export_parts = []
 
     bots.sort(key=lambda x: x["id"])
+    latest_sessions = db.get_latest_sessions([b["id"] for b in bots])
+
+    # Each bot's export is independent blocking DB + formatting work; run them
+    # in worker threads so the bots' trading loops on the event loop keep ticking.
+    exported_ids = [b["id"] for b in bots if b["id"] in latest_sessions]
+    built = await asyncio.gather(*(
+        asyncio.to_thread(_build_session_export, latest_sessions[bot_id])
+        for bot_id in exported_ids
+    ))
+    session_texts = {bot_id: export_text for bot_id, (_, _, export_text) in zip(exported_ids, built)}
 
     now = datetime.now(timezone.utc).isoformat()
     export_parts.append("# Swarm Latest Sessions Export")
@@ -185,25 +195,17 @@ async def export_swarm_latest_sessions():
         bot_id = bot["id"]
         bot_name = bot["name"]
 
-        sessions = db.get_sessions(limit=1, offset=0, bot_id=bot_id)
-
         export_parts.append(f"Bot #{bot_id}: {bot_name}")
         export_parts.append("-" * 40)
 
-        if not sessions:
+        if bot_id not in session_texts:
             export_parts.append("No sessions found.")
             export_parts.append("")
             export_parts.append("=" * 60)
             export_parts.append("")
             continue
 
-        session = sessions[0]
-        stats = db.get_session_stats(session.id)
-        trades_with_logs = db.get_trades_with_log_data(session.id)
-        analytics = _calculate_session_analytics(stats, trades_with_logs)
-        session_text = _format_session_export(session, stats, analytics, trades_with_logs)
-
-        export_parts.append(session_text)
+        export_parts.append(session_texts[bot_id])
         export_parts.append("")
         export_parts.append("=" * 60)
         export_parts.append("")
@@ -288,14 +290,8 @@ async def update_bot_config(bot_id: int, request: ConfigUpdateRequest):
         raise HTTPException(status_code=404, detail=f"Bot {bot_id} not found")
     try:
         data = request.model_dump(exclude_none=True)
+        # BotInstance.update_config persists to the DB itself
         updated = instance.update_config(data)
-        # Persist to DB
-        db.update_bot(
-            bot_id,
-            config_json=json.dumps(updated.to_dict()),
-            mode=updated.mode,
-            updated_at=datetime.now(timezone.utc),
-        )
         logger.info(f"Bot #{bot_id} config updated: {list(data.keys())}")
         return updated.to_dict()
     except Exception as e:
@@ -471,7 +467,7 @@ async def get_trade_details(trade_id: int):
     log_data = None
     if log_data_str:
         try:
-            log_data = json.loads(log_data_str)
+            log_data = db.loads_log_data(log_data_str)
         except json.JSONDecodeError:
             log_data = None
 
@@ -506,33 +502,57 @@ async def get_session_details(session_id: int):
     }
 
 
-def _calculate_session_analytics(stats, trades_with_logs):
-    """Compute detailed analytics for a session."""
-    filled = [(t, ld) for t, ld in trades_with_logs if t.status.value == "filled"]
-    wins = [(t, ld) for t, ld in filled if (t.pnl or 0) > 0]
-    losses = [(t, ld) for t, ld in filled if (t.pnl or 0) < 0]
+def _decode_trade_logs(trades_with_logs):
+    """Decode each trade's raw log JSON once, for both analytics and export.
 
-    avg_win = sum(t.pnl for t, _ in wins) / len(wins) if wins else 0.0
-    avg_loss = sum(t.pnl for t, _ in losses) / len(losses) if losses else 0.0
-    profit_factor = abs(sum(t.pnl for t, _ in wins) / sum(t.pnl for t, _ in losses)) if losses and sum(t.pnl for t, _ in losses) != 0 else float("inf")
-    total_fees = sum(t.fees for t, _ in filled)
-
-    # Count exit reasons
-    exit_reasons = {}
-    for t, ld in filled:
-        if ld:
+    Returns (Trade, dict) tuples; missing, malformed or non-object logs
+    become None.
+    """
+    decoded = []
+    for trade, raw in trades_with_logs:
+        log = None
+        if raw:
             try:
-                log = json.loads(ld)
-                reason = log.get("exit_reason", "unknown")
-                exit_reasons[reason] = exit_reasons.get(reason, 0) + 1
-            except Exception:
+                log = db.loads_log_data(raw)
+            except (ValueError, TypeError):
                 pass
+            if not isinstance(log, dict):
+                log = None
+        decoded.append((trade, log))
+    return decoded
+
+
+def _calculate_session_analytics(stats, trades_with_logs):
+    """Compute detailed analytics for a session's filled trades (logs already decoded)."""
+    total = wins = losses = 0
+    win_pnl = loss_pnl = total_fees = 0.0
+    exit_reasons = {}
+
+    # One pass over the session: counts, P&L sums, fees and exit reasons
+    for t, log in trades_with_logs:
+        total += 1
+        total_fees += t.fees
+        pnl = t.pnl or 0
+        if pnl > 0:
+            wins += 1
+            win_pnl += pnl
+        elif pnl < 0:
+            losses += 1
+            loss_pnl += pnl
+
+        if log is not None:
+            reason = log.get("exit_reason", "unknown")
+            exit_reasons[reason] = exit_reasons.get(reason, 0) + 1
+
+    avg_win = win_pnl / wins if wins else 0.0
+    avg_loss = loss_pnl / losses if losses else 0.0
+    profit_factor = abs(win_pnl / loss_pnl) if losses and loss_pnl != 0 else float("inf")
 
     return {
-        "total_trades": len(filled),
-        "wins": len(wins),
-        "losses": len(losses),
-        "win_rate": len(wins) / len(filled) if filled else 0.0,
+        "total_trades": total,
+        "wins": wins,
+        "losses": losses,
+        "win_rate": wins / total if total else 0.0,
         "avg_win": round(avg_win, 2),
         "avg_loss": round(avg_loss, 2),
         "profit_factor": round(profit_factor, 2) if profit_factor != float("inf") else None,
@@ -543,6 +563,22 @@ def _calculate_session_analytics(stats, trades_with_logs):
     }
 
 
+def _build_session_export(session):
+    """Load a session's filled trades and render its AI export.
+
+    Blocking (SQLite + formatting) — call via asyncio.to_thread from handlers.
+    """
+    stats = db.get_session_stats(session.id)
+    # Sessions with no fills (e.g. stopped before the first trade) skip the
+    # trade/log query and decode entirely.
+    trades_with_logs = _decode_trade_logs(
+        db.get_filled_trades_with_log_data(session.id)
+    ) if stats.total_trades else []
+    analytics = _calculate_session_analytics(stats, trades_with_logs)
+    export_text = _format_session_export(session, stats, analytics, trades_with_logs)
+    return stats, analytics, export_text
+
+
 @app.get("/api/sessions/{session_id}/export")
 async def export_session(session_id: int):
     """Export a complete session as structured text optimized for AI consumption."""
@@ -550,11 +586,7 @@ async def export_session(session_id: int):
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    stats = db.get_session_stats(session_id)
-    trades_with_logs = db.get_trades_with_log_data(session_id)
-
-    analytics = _calculate_session_analytics(stats, trades_with_logs)
-    export_text = _format_session_export(session, stats, analytics, trades_with_logs)
+    stats, analytics, export_text = await asyncio.to_thread(_build_session_export, session)
 
     return {
         "session": session.model_dump(),
@@ -565,8 +597,15 @@ async def export_session(session_id: int):
 
 
 
+# (log key, label) pairs for the order-book lines in the session export
+_EXPORT_ORDERBOOKS = (("orderbook_up", "UP Token"), ("orderbook_down", "DOWN Token"))
+
+# Display label per side, built once instead of upper-casing per trade
+_EXPORT_SIDE_LABELS = {side: side.value.upper() for side in Side}
+
+
 def _format_session_export(session, stats, analytics, trades_with_logs) -> str:
-    """Format a session as structured text for AI consumption."""
+    """Format a session's filled trades as structured text for AI consumption (logs already decoded)."""
     lines = []
     now = datetime.now(timezone.utc).isoformat()
 
@@ -605,14 +644,12 @@ def _format_session_export(session, stats, analytics, trades_with_logs) -> str:
 
     # Trade Log
     lines.append("## Trade Log")
-    for trade, log_data_str in trades_with_logs:
-        if trade.status.value != "filled":
-            continue
-
+    for trade, log in trades_with_logs:
         pnl_str = f"${trade.pnl:+.2f}" if trade.pnl is not None else "pending"
-        lines.append(f"### Trade #{trade.id} — {trade.side.value.upper()} @ ¢{trade.price * 100:.1f} → P&L: {pnl_str}")
+        side = _EXPORT_SIDE_LABELS[trade.side]
+        lines.append(f"### Trade #{trade.id} — {side} @ ¢{trade.price * 100:.1f} → P&L: {pnl_str}")
         lines.append(f"- Time: {trade.timestamp.isoformat()}")
-        lines.append(f"- Side: {trade.side.value.upper()}")
+        lines.append(f"- Side: {side}")
         lines.append(f"- Entry Price: ¢{trade.price * 100:.1f}")
         lines.append(f"- Size: {trade.size:.2f} tokens")
         lines.append(f"- Cost: ${trade.cost:.2f}")
@@ -620,35 +657,35 @@ def _format_session_export(session, stats, analytics, trades_with_logs) -> str:
         lines.append(f"- Signal Score: {trade.signal_score:+.3f}")
         lines.append(f"- Dry Run: {'yes' if trade.is_dry_run else 'no'}")
 
-        if log_data_str:
-            try:
-                log = json.loads(log_data_str)
-            except Exception:
-                log = {}
-
+        if log is not None:
             # Exit metadata
-            if log.get("exit_reason"):
-                lines.append(f"- Exit Reason: {log['exit_reason']}")
-            if log.get("exit_reason_detail"):
-                lines.append(f"- Exit Detail: {log['exit_reason_detail']}")
-            if log.get("exit_price") is not None:
-                lines.append(f"- Exit Price: ¢{log['exit_price'] * 100:.1f}")
-            if log.get("peak_price") is not None:
-                lines.append(f"- Peak Price: ¢{log['peak_price'] * 100:.1f}")
-            if log.get("drawdown_from_peak") is not None:
-                lines.append(f"- Drawdown from Peak: {log['drawdown_from_peak']:.1%}")
-            if log.get("position_held_duration_seconds") is not None:
-                dur = int(log["position_held_duration_seconds"])
+            exit_reason = log.get("exit_reason")
+            if exit_reason:
+                lines.append(f"- Exit Reason: {exit_reason}")
+            exit_detail = log.get("exit_reason_detail")
+            if exit_detail:
+                lines.append(f"- Exit Detail: {exit_detail}")
+            exit_price = log.get("exit_price")
+            if exit_price is not None:
+                lines.append(f"- Exit Price: ¢{exit_price * 100:.1f}")
+            peak_price = log.get("peak_price")
+            if peak_price is not None:
+                lines.append(f"- Peak Price: ¢{peak_price * 100:.1f}")
+            drawdown = log.get("drawdown_from_peak")
+            if drawdown is not None:
+                lines.append(f"- Drawdown from Peak: {drawdown:.1%}")
+            held = log.get("position_held_duration_seconds")
+            if held is not None:
+                dur = int(held)
                 lines.append(f"- Position Duration: {dur // 60}m {dur % 60}s")
-            if log.get("time_remaining_at_exit") is not None:
-                tr = log["time_remaining_at_exit"]
-                if isinstance(tr, (int, float)):
-                    lines.append(f"- Time Remaining at Exit: {int(tr) // 60}m {int(tr) % 60}s")
+            tr = log.get("time_remaining_at_exit")
+            if isinstance(tr, (int, float)):
+                lines.append(f"- Time Remaining at Exit: {int(tr) // 60}m {int(tr) % 60}s")
 
             # Buy state
-            buy_state = log.get("buy_state", {})
+            buy_state = log.get("buy_state")
             if buy_state:
-                signal = buy_state.get("signal", {})
+                signal = buy_state.get("signal")
                 if signal:
                     lines.append(f"- Entry Signal: composite={signal.get('composite_score', 0):+.3f}")
                     l1 = signal.get("layer1")
@@ -669,22 +706,23 @@ def _format_session_export(session, stats, analytics, trades_with_logs) -> str:
                         alignment = l2.get("alignment_count", 0)
                         total_tf = l2.get("total_timeframes", 6)
                         lines.append(f"  - L2 (BTC Multi-TF): direction={direction_val:+.3f} | alignment={alignment}/{total_tf}")
-                        tfs = l2.get("timeframe_signals", {})
-                        for tf_name, tf_val in tfs.items():
-                            if isinstance(tf_val, (int, float)):
-                                arrow = "↑" if tf_val > 0.1 else "↓" if tf_val < -0.1 else "—"
-                                lines.append(f"    - {tf_name}: {tf_val:+.3f} {arrow}")
+                        tfs = l2.get("timeframe_signals")
+                        if tfs:
+                            for tf_name, tf_val in tfs.items():
+                                if isinstance(tf_val, (int, float)):
+                                    arrow = "↑" if tf_val > 0.1 else "↓" if tf_val < -0.1 else "—"
+                                    lines.append(f"    - {tf_name}: {tf_val:+.3f} {arrow}")
 
                 btc_price = buy_state.get("btc_price")
                 if btc_price:
                     lines.append(f"- BTC Price at Entry: ${btc_price:,.2f}")
 
                 # Order book summary
-                for book_key, label in [("orderbook_up", "UP Token"), ("orderbook_down", "DOWN Token")]:
-                    ob = buy_state.get(book_key, {})
+                for book_key, label in _EXPORT_ORDERBOOKS:
+                    ob = buy_state.get(book_key)
                     if ob:
-                        bids = ob.get("bids", [])
-                        asks = ob.get("asks", [])
+                        bids = ob.get("bids")
+                        asks = ob.get("asks")
                         bid_depth = sum(float(b.get("size", 0)) for b in bids[:5]) if bids else 0
                         ask_depth = sum(float(a.get("size", 0)) for a in asks[:5]) if asks else 0
                         best_bid = float(bids[0].get("price", 0)) if bids else 0
@@ -692,36 +730,38 @@ def _format_session_export(session, stats, analytics, trades_with_logs) -> str:
                         lines.append(f"  - {label} Book: bid={best_bid:.3f} ask={best_ask:.3f} | depth: bid={bid_depth:.0f} ask={ask_depth:.0f}")
 
                 # Risk state
-                risk = buy_state.get("risk_state", {})
+                risk = buy_state.get("risk_state")
                 if risk:
                     lines.append(f"- Risk State: consecutive_losses={risk.get('consecutive_losses', 0)} daily_pnl=${risk.get('daily_pnl', 0):.2f} trades_in_window={risk.get('trades_this_window', 0)}")
 
                 # Market window
-                mw = buy_state.get("market_window_info", {})
+                mw = buy_state.get("market_window_info")
                 if mw and mw.get("time_until_close_seconds") is not None:
                     tuc = int(mw["time_until_close_seconds"])
                     lines.append(f"- Time Until Close at Entry: {tuc // 60}m {tuc % 60}s")
 
                 # Config snapshot
-                config = buy_state.get("config_snapshot", {})
+                config = buy_state.get("config_snapshot")
                 if config:
-                    lines.append(f"- Config: mode={config.get('mode', 'N/A')} order_type={config.get('trading', {}).get('order_type', 'N/A')} buy_threshold={config.get('signal', {}).get('buy_threshold', 'N/A')}")
-                    exit_cfg = config.get("exit", {})
+                    trading_cfg = config.get("trading", {})
+                    signal_cfg = config.get("signal", {})
+                    lines.append(f"- Config: mode={config.get('mode', 'N/A')} order_type={trading_cfg.get('order_type', 'N/A')} buy_threshold={signal_cfg.get('buy_threshold', 'N/A')}")
+                    exit_cfg = config.get("exit")
                     if exit_cfg:
                         lines.append(f"  - Exit: trailing={exit_cfg.get('trailing_stop_pct', 'N/A')} hard={exit_cfg.get('hard_stop_pct', 'N/A')} reversal={exit_cfg.get('signal_reversal_threshold', 'N/A')} pressure={exit_cfg.get('pressure_scaling_enabled', 'N/A')}")
 
             # Sell state (if different from buy)
-            sell_state = log.get("sell_state", {})
+            sell_state = log.get("sell_state")
             if sell_state:
-                signal = sell_state.get("signal", {})
+                signal = sell_state.get("signal")
                 if signal:
                     lines.append(f"- Exit Signal: composite={signal.get('composite_score', 0):+.3f}")
                 btc_price = sell_state.get("btc_price")
                 if btc_price:
                     lines.append(f"- BTC Price at Exit: ${btc_price:,.2f}")
 
-            # BTC candles
-            candles = buy_state.get("btc_candles_summary", {})
+            # BTC candles (buy_state may be null in the log, not just absent)
+            candles = buy_state.get("btc_candles_summary") if buy_state else None
             if candles:
                 candle_parts = []
                 for tf, data in candles.items():
@@ -765,13 +805,6 @@ async def update_config(request: ConfigUpdateRequest):
     try:
         data = request.model_dump(exclude_none=True)
         updated = instance.update_config(data)
-        bot_id = 1  # default bot
-        db.update_bot(
-            bot_id,
-            config_json=json.dumps(updated.to_dict()),
-            mode=updated.mode,
-            updated_at=datetime.now(timezone.utc),
-        )
         logger.info(f"Configuration updated: {list(data.keys())}")
         return updated.to_dict()
     except Exception as e:
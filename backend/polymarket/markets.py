@@ -29,13 +29,25 @@ BTC_15M_SLUG_PATTERN = "btc-updown-15m"
 # Market window duration in seconds
 WINDOW_DURATION_SECONDS = 900  # 15 minutes
 
+# Shared Gamma API client — every bot creates its own MarketDiscovery, so
+# pooling one client lets them reuse keep-alive connections instead of
+# paying a fresh TCP/TLS handshake per instance.
+_http_client: Optional[httpx.Client] = None
+
+
+def _get_http_client() -> httpx.Client:
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.Client(timeout=15.0)
+    return _http_client
+
 
 class MarketDiscovery:
     """Discovers and tracks active Polymarket BTC 15-min markets."""
 
     def __init__(self):
         self._current_market: Optional[MarketInfo] = None
-        self._http = httpx.Client(timeout=15.0)
+        self._http = _get_http_client()
         self._last_scan = 0.0
 
     @property
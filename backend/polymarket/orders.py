@@ -558,17 +558,16 @@ class OrderManager:
                 logger.error(f"Error cancelling orders: {e}")
 
 
+# Exit-reason prefixes, in match order; the prefix doubles as the category
+_EXIT_REASON_CATEGORIES = ("trailing_stop", "hard_stop", "signal_reversal", "market_close")
+
+
 def _parse_exit_reason(reason: str) -> str:
     """Parse a detailed exit reason string into a category."""
     reason_lower = reason.lower()
-    if reason_lower.startswith("trailing_stop"):
-        return "trailing_stop"
-    elif reason_lower.startswith("hard_stop"):
-        return "hard_stop"
-    elif reason_lower.startswith("signal_reversal"):
-        return "signal_reversal"
-    elif reason_lower.startswith("market_close"):
-        return "market_close"
+    for category in _EXIT_REASON_CATEGORIES:
+        if reason_lower.startswith(category):
+            return category
     return "unknown"
 
 
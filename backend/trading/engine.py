@@ -788,9 +788,8 @@ class TradingEngine:
 
         if self._current_session_id:
             daily_stats = db.get_session_stats(self._current_session_id)
-            recent_trades = db.get_trades_for_session(self._current_session_id)
             # We take top 20 for the dashboard list
-            recent_trades = recent_trades[:20]
+            recent_trades = db.get_trades_for_session(self._current_session_id, limit=20)
         else:
             # Fallback to daily stats if no active session
             daily_stats = db.get_daily_stats(bot_id=self._bot_id)
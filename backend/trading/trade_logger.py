@@ -27,12 +27,16 @@ class TradeLogger:
         Retrieve complete trade log entry for a trade.
         Reconstructs TradeLogEntry from Trade and stored log data.
         """
-        log_data_str = db.get_trade_log_data(trade.id)
+        return TradeLogger._build_log_entry(trade, db.get_trade_log_data(trade.id))
+
+    @staticmethod
+    def _build_log_entry(trade: Trade, log_data_str: Optional[str]) -> Optional[TradeLogEntry]:
+        """Build a TradeLogEntry from a trade and its already-fetched raw log data."""
         if not log_data_str:
             return None
 
         try:
-            log_data = json.loads(log_data_str)
+            log_data = db.loads_log_data(log_data_str)
             
             # Reconstruct TradeLogEntry
             entry = TradeLogEntry(
@@ -109,17 +113,15 @@ class TradeLogger:
         
         logger.info(f"Exporting trade logs to {file_path}")
         
-        # Get all trades
-        all_trades = db.get_all_trades()
-        logger.info(f"Found {len(all_trades)} total trades")
-        
-        # Build log entries
+        # Stream trades and their log data from a single query
         log_entries = []
+        total_count = 0
         complete_count = 0
         incomplete_count = 0
         
-        for trade in all_trades:
-            entry = TradeLogger.get_trade_log_entry(trade)
+        for trade, log_data_str in db.iter_all_trades_with_log_data():
+            total_count += 1
+            entry = TradeLogger._build_log_entry(trade, log_data_str)
             
             if entry:
                 # Complete entry with log data
@@ -149,10 +151,12 @@ class TradeLogger:
                 log_entries.append(basic_entry)
                 incomplete_count += 1
         
+        logger.info(f"Found {total_count} total trades")
+        
         # Create export structure
         export_data = {
             "export_timestamp": datetime.now().isoformat(),
-            "total_trades": len(all_trades),
+            "total_trades": total_count,
             "complete_logs": complete_count,
             "incomplete_logs": incomplete_count,
             "trades": log_entries,
@@ -176,21 +180,12 @@ class TradeLogger:
     @staticmethod
     def get_trade_summary() -> dict:
         """Get summary statistics about trade logs."""
-        all_trades = db.get_all_trades()
-        complete_logs = 0
-        incomplete_logs = 0
-        
-        for trade in all_trades:
-            log_data = db.get_trade_log_data(trade.id)
-            if log_data:
-                complete_logs += 1
-            else:
-                incomplete_logs += 1
-        
+        total_trades, complete_logs = db.get_trade_log_counts()
+
         return {
-            "total_trades": len(all_trades),
+            "total_trades": total_trades,
             "complete_logs": complete_logs,
-            "incomplete_logs": incomplete_logs,
+            "incomplete_logs": total_trades - complete_logs,
             "export_file_path": str(EXPORT_FILE_PATH),
         }
 